@@ -0,0 +1,235 @@
+#! /usr/bin/env python3
+import argparse
+import math
+import multiprocessing
+import random
+import re
+import sys
+import textwrap
+import time
+
+from main import Matcher, regex_rules
+
+proginfo = textwrap.dedent('''\
+    Benchmark the regex rules of main.py at every extract level.
+
+    Each rule mode runs over synthetic corpora of increasing size, including
+    adversarial inputs that trigger catastrophic backtracking. The
+    throughput (MB/s) at the largest size and the growth exponent of the
+    running time (time ~ size^exponent, by a log-log fit over the largest
+    sizes) are reported. The runs take place in a child process, which is
+    killed once a run takes longer than --time-limit; a rule timing out is
+    super-linear. The exit status is 1 if any rule grows faster than
+    --max-exponent.
+''')
+
+# Keywords of the examples in main.py
+keywords = [
+    'John|Max', 'games', 'visit',
+    '(?:\\$?\\d+\\.?\\d?\\d?|price|charges?)(?: is| nett| per)?(?:/| per | an '
+    '| one | half | every | each )(?:unit|(?!hour |hr )\\w+)\\b']
+
+vocabulary = ['John', 'Max', 'games', 'visit', 'company', 'the', 'play',
+              'likes', 'board', 'at', '$25', 'per', 'unit', 'price', 'is',
+              'year', 'ABC', 'of', 'to', 'and']
+
+
+def prose(size):
+    """Sentences of random words, with the keywords among them"""
+    rand = random.Random(10)
+    words = []
+    length = 0
+    while length < size:
+        word = rand.choice(vocabulary)
+        if rand.random() < 0.1:
+            word += '.'
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)[:size]
+
+
+def repeat(unit):
+    """Corpus made by repeating a unit string"""
+    def corpus(size):
+        return (unit * (size // len(unit) + 1))[:size]
+    return corpus
+
+
+# Adversarial inputs: long sentences, words, numbers and gaps without any
+# keyword, and near misses of the keywords
+corpora = {
+    'prose': prose,
+    'no_period': repeat('word '),
+    'one_word': repeat('a'),
+    'digits': repeat('1'),
+    'spaces': lambda size: 'a' + ' ' * (size - 2) + 'b',
+    'near_miss': repeat('visi $2 pe unit Jon gam '),
+}
+
+# Number of the largest sizes used to fit the growth exponent, the times
+# of small sizes being dominated by fixed costs
+fit_sizes = 4
+
+
+def runner(engine, words, extract):
+    """Function scanning a text with the rules"""
+    if engine == 'matcher':
+        matcher = Matcher(words, extract)
+        return lambda text: sum(1 for _ in matcher.finditer(text))
+    patterns = [re.compile(pattern, re.I)
+                for pattern in regex_rules(words, extract)]
+    return lambda text: sum(len(p.findall(text)) for p in patterns)
+
+
+def _worker(conn, engine, words, extract, name, sizes, repeat):
+    """Run the rules over the corpus of each size, sending the times"""
+    run = runner(engine, words, extract)
+    for size in sizes:
+        text = corpora[name](size)
+        conn.send(None)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run(text)
+            conn.send(time.perf_counter() - start)
+
+
+def measure(engine, words, extract, name, sizes, repeat, time_limit):
+    """Best times of running the rules over the corpus of each size.
+
+    The runs take place in a child process, which is killed once a run
+    takes longer than time_limit, so that catastrophic backtracking does
+    not hang the benchmark.
+
+    Returns
+    -------
+    times : list
+        Best times of the sizes completed
+
+    timeout : boolean
+        True if a run was killed
+    """
+    # invalid patterns raise here rather than in the child
+    runner(engine, words, extract)
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    child = multiprocessing.Process(
+        target=_worker,
+        args=(sender, engine, words, extract, name, sizes, repeat))
+    child.start()
+    sender.close()
+    times = []
+    try:
+        for _ in sizes:
+            receiver.recv()  # the corpus is built
+            best = float('inf')
+            for _ in range(repeat):
+                if not receiver.poll(time_limit):
+                    return times, True
+                best = min(best, receiver.recv())
+            times.append(best)
+    finally:
+        child.terminate()
+        child.join()
+        receiver.close()
+    return times, False
+
+
+def exponent(sizes, times):
+    """Slope of the least squares fit of log(time) against log(size)"""
+    x = [math.log(s) for s in sizes]
+    y = [math.log(max(t, 1e-9)) for t in times]
+    mx, my = sum(x) / len(x), sum(y) / len(y)
+    return (sum((a - mx) * (b - my) for a, b in zip(x, y)) /
+            sum((a - mx)**2 for a in x))
+
+
+def benchmark(engine='matcher', words=keywords, base=1024, steps=10,
+              repeat=3, time_limit=2.0):
+    """Run every rule mode over every corpus of increasing sizes.
+
+    Parameters
+    ----------
+    engine : str, default 'matcher'
+        'matcher' scans with Matcher, 'regex' runs re.findall per rule as
+        the regex function of main.py does.
+
+    words : list
+        A list of keywords or regex patterns.
+
+    base : int, default 1024
+        Size in characters of the smallest corpus, doubled at each step.
+
+    steps : int, default 10
+        Number of sizes.
+
+    repeat : int, default 3
+        Number of runs per size, the best time is kept.
+
+    time_limit : float, default 2.0
+        A run taking longer (seconds) is killed, and its rule mode is
+        reported as super-linear.
+
+    Returns
+    -------
+    results : list
+        A list of (corpus, extract, MB/s, exponent, timeout) for each rule
+        mode. The exponent is infinite if a run timed out.
+    """
+    sizes = [base << step for step in range(steps)]
+    results = []
+    for extract in (0, 1, 2):
+        for name in corpora:
+            times, timeout = measure(engine, words, extract, name, sizes,
+                                     repeat, time_limit)
+            done = sizes[:len(times)]
+            rate = done[-1] / 1e6 / max(times[-1], 1e-9) if times else 0.0
+            if timeout or len(times) < 2:
+                growth = float('inf')
+            else:
+                growth = exponent(done[-fit_sizes:], times[-fit_sizes:])
+            results.append((name, extract, rate, growth, timeout))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=proginfo)
+    parser.add_argument('--engine', default='matcher',
+                        choices=['matcher', 'regex'],
+                        help='Matcher, or re.findall per rule. '
+                        'Default (matcher)')
+    parser.add_argument('-k', '--keyword', action='append', default=None,
+                        help='A keyword or regex pattern, may be repeated. '
+                        'Default (the keywords of main.py)')
+    parser.add_argument('-b', '--base', type=int, default=1024,
+                        help='Smallest corpus size in characters. '
+                        'Default (1024)')
+    parser.add_argument('-s', '--steps', type=int, default=10,
+                        help='Number of doubling sizes. Default (10)')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='Runs per size. Default (3)')
+    parser.add_argument('-t', '--time-limit', type=float, default=2.0,
+                        help='Kill a run taking longer (seconds), which is '
+                        'super-linear. Default (2.0)')
+    parser.add_argument('-m', '--max-exponent', type=float, default=1.3,
+                        help='Fail if the time grows faster than '
+                        'size^max-exponent. Default (1.3)')
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.engine, args.keyword or keywords, args.base,
+                        args.steps, args.repeat, args.time_limit)
+    failed = 0
+    print("{:<12}{:>8}{:>12}{:>10}  {}".format(
+        'corpus', 'extract', 'MB/s', 'exponent', 'status'))
+    for name, extract, rate, growth, timeout in results:
+        status = 'ok' if growth <= args.max_exponent else 'SUPER-LINEAR'
+        failed += status != 'ok'
+        if timeout:
+            status += ' (timeout)'
+        print("{:<12}{:>8}{:>12.2f}{:>10.2f}  {}".format(
+            name, extract, rate, growth, status))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
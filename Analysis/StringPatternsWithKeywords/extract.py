@@ -0,0 +1,227 @@
+#! /usr/bin/env python3
+import argparse
+import csv
+import json
+import mmap
+import os
+import sys
+import textwrap
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from main import Matcher
+
+proginfo = textwrap.dedent('''\
+    Extract the keywords of the regex rules (see main.py) from text files.
+
+    Files are split into chunks at sentence (extract=2) or line boundaries,
+    and the chunks are scanned by a pool of processes. Large files are read
+    through memory maps. Each match is written as a record of the file,
+    the byte offset of the extracted text, the keyword and the extracted
+    text, in JSON Lines or CSV format. Matches never cross chunk
+    boundaries.
+''')
+
+# Files of at least this size are read through memory maps
+mmap_size = 1 << 20
+# Bytes searched beyond a nominal chunk end for a boundary
+boundary_scan = 1 << 16
+
+
+def chunk_bounds(path, chunk_size, delimiter):
+    """Split a file into byte ranges ending right after a delimiter.
+
+    Parameters
+    ----------
+    path : str
+        The file name.
+
+    chunk_size : int
+        Nominal number of bytes of a chunk.
+
+    delimiter : bytes
+        A chunk ends after the first delimiter following its nominal end.
+        If none is found within boundary_scan bytes, the chunk ends at a
+        UTF-8 character boundary.
+
+    Returns
+    -------
+    bounds : list
+        A list of (start, end) byte offsets.
+    """
+    size = os.path.getsize(path)
+    if size <= chunk_size:
+        return [(0, size)] if size else []
+    bounds = []
+    with open(path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            end = start + chunk_size
+            if end >= size:
+                end = size
+            else:
+                found = mm.find(delimiter, end, end + boundary_scan)
+                if found != -1:
+                    end = found + len(delimiter)
+                else:
+                    # do not split a multi-byte character
+                    while end < size and mm[end] & 0xC0 == 0x80:
+                        end += 1
+            bounds.append((start, end))
+            start = end
+    return bounds
+
+
+def read_chunk(path, start, end):
+    """Read the bytes of a file from start to end"""
+    with open(path, 'rb') as f:
+        if end - start < mmap_size:
+            f.seek(start)
+            return f.read(end - start)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[start:end]
+
+
+def scan(path, start, end, words, extract):
+    """Scan a chunk of a file with the rules of the keywords.
+
+    Returns
+    -------
+    records : list
+        A list of (file, byte offset, keyword, extracted text).
+    """
+    # invalid bytes are decoded to lone surrogates and encoded back to the
+    # same bytes, so that the byte offsets are exact
+    text = read_chunk(path, start, end).decode('utf-8',
+                                               errors='surrogateescape')
+    records = []
+    # byte offsets are accumulated since the matches are sorted by start
+    pos, offset = 0, start
+    for word, m_start, _, span in Matcher(words, extract).finditer(text):
+        offset += len(text[pos:m_start].encode('utf-8',
+                                               errors='surrogateescape'))
+        pos = m_start
+        # the written text shows the invalid bytes as U+FFFD
+        span = span.encode('utf-8', errors='surrogateescape').decode(
+            'utf-8', errors='replace')
+        records.append((path, offset, word, span))
+    return records
+
+
+def tasks(paths, chunk_size, delimiter):
+    """Iterate over the chunks of all the files"""
+    for path in paths:
+        for start, end in chunk_bounds(path, chunk_size, delimiter):
+            yield path, start, end
+
+
+def run(paths, words, extract, writer, processes=None,
+        chunk_size=8 << 20, max_pending=None):
+    """Scan files with a pool of processes and write the match records.
+
+    Parameters
+    ----------
+    paths : list
+        A list of file names.
+
+    words : list
+        A list of keywords or regex patterns.
+
+    extract : int
+        Same as the 'extract' in the regex_rules function.
+
+    writer : callable
+        Function called with each record (file, offset, keyword, text).
+
+    processes : int, default None
+        Number of processes, default to the number of CPUs.
+
+    chunk_size : int, default 8 MB
+        Nominal number of bytes of a chunk.
+
+    max_pending : int, default None
+        Maximum number of chunks scanned and not yet written, which bounds
+        the memory. Default to twice the number of processes.
+
+    Returns
+    -------
+    stats : dict
+        Number of bytes, chunks and matches, and the elapsed time.
+    """
+    delimiter = b'.' if extract == 2 else b'\n'
+    processes = processes or os.cpu_count() or 1
+    max_pending = max_pending or 2 * processes
+    stats = {'bytes': 0, 'chunks': 0, 'matches': 0}
+    begin = time.time()
+    pending = deque()
+
+    def collect():
+        future, size = pending.popleft()
+        for record in future.result():
+            writer(record)
+            stats['matches'] += 1
+        stats['bytes'] += size
+        stats['chunks'] += 1
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for path, start, end in tasks(paths, chunk_size, delimiter):
+            if len(pending) >= max_pending:
+                collect()
+            pending.append((executor.submit(scan, path, start, end, words,
+                                            extract), end - start))
+        while pending:
+            collect()
+    stats['seconds'] = time.time() - begin
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=proginfo)
+    parser.add_argument('files', nargs='+', help='Input text files')
+    parser.add_argument('-k', '--keyword', action='append', required=True,
+                        help='A keyword or regex pattern, may be repeated')
+    parser.add_argument('-e', '--extract', type=int, default=0,
+                        choices=[0, 1, 2],
+                        help='The extract rule of regex_rules. Default (0)')
+    parser.add_argument('-f', '--format', default='jsonl',
+                        choices=['jsonl', 'csv'],
+                        help='Output format. Default (jsonl)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Output file. Default (stdout)')
+    parser.add_argument('-p', '--processes', type=int, default=None,
+                        help='Number of processes. Default (number of CPUs)')
+    parser.add_argument('-c', '--chunk-size', type=float, default=8,
+                        help='Nominal chunk size in MB. Default (8)')
+    args = parser.parse_args(argv)
+
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    fields = ['file', 'offset', 'keyword', 'text']
+    if args.format == 'csv':
+        csv_writer = csv.writer(out)
+        csv_writer.writerow(fields)
+        writer = csv_writer.writerow
+    else:
+        def writer(record):
+            out.write(json.dumps(dict(zip(fields, record))) + '\n')
+
+    try:
+        stats = run(args.files, args.keyword, args.extract, writer,
+                    args.processes, int(args.chunk_size * (1 << 20)))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    seconds = max(stats['seconds'], 1e-9)
+    print("{} files, {} chunks, {:.1f} MB, {} matches in {:.2f} s "
+          "({:.1f} MB/s)".format(len(args.files), stats['chunks'],
+                                 stats['bytes'] / 1e6, stats['matches'],
+                                 seconds, stats['bytes'] / 1e6 / seconds),
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
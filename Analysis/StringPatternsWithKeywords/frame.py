@@ -0,0 +1,116 @@
+""" Keyword extraction over text columns of pandas DataFrames."""
+import re
+import warnings
+
+import pandas as pd
+
+from main import compile_rules
+
+
+def _chunks(series, chunksize=None):
+    """Iterate over a Series by chunks, or over an iterable of Series"""
+    if not isinstance(series, pd.Series):
+        for chunk in series:
+            yield chunk
+    elif chunksize is None:
+        yield series
+    else:
+        for start in range(0, len(series), chunksize):
+            yield series.iloc[start:start + chunksize]
+
+
+def extract_frame(series, words, extract=0, flags=re.I, chunksize=None):
+    """Extract the keywords from a text column with pandas string methods.
+
+    The rules of all the keywords are applied at once through
+    Series.str.extractall with the compiled alternation of compile_rules,
+    so matches of different keywords do not overlap, as with Matcher.
+    With extract=2, the regex rules backtrack on long sentences, so they
+    suit short texts such as addresses or ads; see extract_sentences of
+    main.py for long documents.
+
+    Parameters
+    ----------
+    series : pandas.Series, or iterable of pandas.Series
+        Text column, e.g. df['Address'], or its chunks, e.g. the column of
+        the chunks of pandas.read_csv(..., chunksize=...).
+
+    words : list
+        A list of keywords or regex patterns.
+
+    extract : int, default 0
+        Same as the 'extract' in the regex_rules function.
+
+    flags : int, default re.I
+        Flags of the compiled pattern.
+
+    chunksize : int, default None
+        If given, a Series is processed by chunks of chunksize rows.
+
+    Returns
+    -------
+    matches : pandas.DataFrame
+        A DataFrame with the columns 'keyword' and 'text', indexed by the
+        row labels of series and the number of the match within the row.
+    """
+    pattern = compile_rules(tuple(words), extract, flags)
+    names = ['k{}'.format(i) for i in range(len(words))]
+    labels = dict(zip(names, words))
+    tables = []
+    for chunk in _chunks(series, chunksize):
+        found = chunk.dropna().astype(str).str.extractall(pattern)
+        if found.empty:
+            continue
+        # each match has one non-null named group, that of its keyword
+        stacked = found[names].stack().dropna()
+        keyword = stacked.index.get_level_values(-1).map(labels)
+        tables.append(pd.DataFrame(
+            {'keyword': keyword, 'text': stacked.values},
+            index=stacked.index.droplevel(-1)))
+    if not tables:
+        index = pd.MultiIndex.from_arrays([[], []], names=[None, 'match'])
+        return pd.DataFrame({'keyword': [], 'text': []}, index=index)
+    return pd.concat(tables)
+
+
+def contains_frame(series, words, extract=0, flags=re.I, chunksize=None):
+    """Flag the rows of a text column having each keyword.
+
+    Parameters
+    ----------
+    series : pandas.Series, or iterable of pandas.Series
+        Text column, or its chunks.
+
+    words : list
+        A list of keywords or regex patterns.
+
+    extract : int, default 0
+        Same as the 'extract' in the regex_rules function. It only affects
+        the keywords whose extract=1 rule requires adjacent words.
+
+    flags : int, default re.I
+        Flags of the compiled patterns.
+
+    chunksize : int, default None
+        If given, a Series is processed by chunks of chunksize rows.
+
+    Returns
+    -------
+    flags : pandas.DataFrame
+        Boolean DataFrame with one column per keyword, indexed by the row
+        labels of series. Missing texts are False.
+    """
+    patterns = [compile_rules((word,), extract, flags) for word in words]
+    tables = []
+    with warnings.catch_warnings():
+        # the rules of extract=0 have capturing groups, which are unused
+        warnings.simplefilter('ignore', UserWarning)
+        for chunk in _chunks(series, chunksize):
+            text = chunk.astype(object)
+            tables.append(pd.DataFrame(
+                {word: text.str.contains(pattern, na=False).astype(bool)
+                 for word, pattern in zip(words, patterns)},
+                index=chunk.index))
+    if not tables:
+        return pd.DataFrame(columns=words, dtype=bool)
+    return pd.concat(tables)
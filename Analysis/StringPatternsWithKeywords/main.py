@@ -1,4 +1,6 @@
 #! /usr/bin/env python3
+import bisect
+import functools
 import textwrap
 import re
 
@@ -37,13 +39,215 @@ def regex_rules(words, extract=0):
         elif extract == 1:
             # \w or \\w are the same
             # The usage of () implies a backreference, need (?: )
-            pattern = '(?:\w+\s+|\\b)(?:' + word + ')(?:\s+\w+|\\b)'
+            # \\b before \w+ avoids retrying from every letter of a long
+            # word, which takes quadratic time, with the same matches
+            pattern = '(?:\\b\w+\s+|\\b)(?:' + word + ')(?:\s+\w+|\\b)'
         elif extract == 2:
             pattern = "(?:\.?|^)[^.]*\\b(?:" + word + ")\\b[^.]*(?:\.?|$)" 
         patterns.append(pattern)
     return patterns
 
 
+@functools.lru_cache(maxsize=None)
+def compile_rules(words, extract=0, flags=re.I):
+    """Compile the regex rules of all the keywords into a single pattern.
+
+    The rule of each keyword is wrapped in a named group 'k<i>', where i is
+    the position of the keyword in words. The compiled patterns are cached.
+
+    Parameters
+    ----------
+    words : tuple
+        A tuple of keywords or regex patterns.
+
+    extract : int, default 0
+        Same as the 'extract' in the regex_rules function.
+
+    flags : int, default re.I
+        Flags of the compiled pattern.
+
+    Returns
+    -------
+    pattern : re.Pattern
+        The compiled alternation of the rules.
+    """
+    patterns = regex_rules(list(words), extract)
+    return re.compile('|'.join('(?P<k{}>{})'.format(i, pattern)
+                               for i, pattern in enumerate(patterns)), flags)
+
+
+@functools.lru_cache(maxsize=None)
+def compile_keywords(words, flags=re.I):
+    """Compile each keyword within word boundaries, as used by extract=2.
+
+    Parameters
+    ----------
+    words : tuple
+        A tuple of keywords or regex patterns.
+
+    flags : int, default re.I
+        Flags of the compiled patterns.
+
+    Returns
+    -------
+    patterns : list
+        A list of compiled patterns of the keywords.
+    """
+    return [re.compile('\\b(?:' + word + ')\\b', flags) for word in words]
+
+
+def _next_period(periods, pos, n):
+    """Position of the first period at or after pos, or n if none"""
+    k = bisect.bisect_left(periods, pos)
+    return periods[k] if k < len(periods) else n
+
+
+def sentence_spans(text, words, flags=re.I):
+    """Find the sentences having the keywords, as the extract=2 rule does.
+
+    The extract=2 regex backtracks over every start position of a long
+    sentence without the keyword, which takes quadratic time. Here the
+    periods of the text are indexed once, sentences without the keyword
+    are skipped as a whole, and the keyword is searched once per position,
+    so the running time is linear in the length of the text. The spans are
+    the same as those of re.finditer with the extract=2 rule of each
+    keyword: a sentence includes its closing period, and also the
+    preceding period if the previous sentence was not extracted for the
+    same keyword.
+
+    Parameters
+    ----------
+    text : str
+        The input text.
+
+    words : list
+        A list of keywords or regex patterns.
+
+    flags : int, default re.I
+        Flags of the compiled patterns.
+
+    Returns
+    -------
+    spans : list
+        A list of (keyword index, start, end) sorted by start.
+    """
+    n = len(text)
+    periods = [m.start() for m in re.finditer('\\.', text)]
+    spans = []
+    for i, pattern in enumerate(compile_keywords(tuple(words), flags)):
+        pos = 0
+        hit = pattern.search(text, pos)
+        while hit is not None:
+            # The regex fails from every position before the last period
+            # preceding the leftmost keyword, and succeeds from there on
+            k = bisect.bisect_left(periods, hit.start()) - 1
+            start = periods[k] if k >= 0 and periods[k] >= pos else pos
+            # [^.]* backtracks from the end of the sentence, so the
+            # rightmost keyword of the sentence is the one matched
+            lead = text[start:start + 1] == '.'
+            stop = _next_period(periods, start + lead, n)
+            last = hit
+            hit = pattern.search(text, last.start() + 1)
+            while hit is not None and hit.start() <= stop:
+                last = hit
+                hit = pattern.search(text, last.start() + 1)
+            end = _next_period(periods, last.end(), n)
+            end = end + 1 if end < n else n
+            spans.append((i, start, end))
+            pos = end
+            if hit is not None and hit.start() < pos:
+                hit = pattern.search(text, pos)
+    spans.sort(key=lambda span: (span[1], span[0]))
+    return spans
+
+
+def extract_sentences(text, words, flags=re.I):
+    """Extract the sentences having the keywords in linear time.
+
+    Same results as re.findall with the extract=2 rules of regex_rules.
+
+    Parameters
+    ----------
+    text : str
+        The input text.
+
+    words : list
+        A list of keywords or regex patterns.
+
+    flags : int, default re.I
+        Flags of the compiled patterns.
+
+    Returns
+    -------
+    extracted : dict
+        Dictionary with the keywords as keys, lists of the extracted
+        sentences as values.
+    """
+    return Matcher(words, 2, flags).findall(text)
+
+
+class Matcher(object):
+    """Match all the keywords in a single pass over the text.
+
+    Unlike running re.findall once per rule, matches of different keywords
+    cannot overlap with extract 0 or 1: the leftmost match wins, and the
+    earlier keyword in words wins if two rules match at the same position.
+    With extract=2, the sentences are found by sentence_spans, which gives
+    the same results as each rule on its own.
+
+    Parameters
+    ----------
+    words : list
+        A list of keywords or regex patterns.
+
+    extract : int, default 0
+        Same as the 'extract' in the regex_rules function.
+
+    flags : int, default re.I
+        Flags of the compiled pattern.
+
+    Attributes
+    ----------
+    pattern : re.Pattern
+        The compiled alternation of the rules of all the keywords.
+    """
+    def __init__(self, words, extract=0, flags=re.I):
+        self.words = list(words)
+        self.extract = extract
+        self.pattern = compile_rules(tuple(words), extract, flags)
+
+    def finditer(self, text):
+        """Iterate over the matches in text.
+
+        Yields
+        ------
+        match : tuple
+            (keyword, start, end, extracted text) of each match.
+        """
+        words = self.words
+        if self.extract == 2:
+            for i, start, end in sentence_spans(text, words,
+                                                self.pattern.flags):
+                yield words[i], start, end, text[start:end]
+            return
+        for m in self.pattern.finditer(text):
+            yield words[int(m.lastgroup[1:])], m.start(), m.end(), m.group()
+
+    def findall(self, text):
+        """Find the extracted texts of all the keywords.
+
+        Returns
+        -------
+        extracted : dict
+            Dictionary with the keywords as keys, lists of the extracted
+            texts as values.
+        """
+        extracted = {word: [] for word in self.words}
+        for word, _, _, span in self.finditer(text):
+            extracted[word].append(span)
+        return extracted
+
+
 def regex(text, keyword, rule):
     """A simple function used to test the text extraction
     based on the designed regular expression patterns.
@@ -81,6 +285,7 @@ if __name__ == "__main__":
     keyword1 = ['John|Max', 'games']
     regex(text1, keyword1, rule0)
     regex(text1, keyword1, rule1)
+    print(Matcher(keyword1, rule1).findall(text1))
     
     text0 = textwrap.dedent("""
     I visited the company a few years ago.
@@ -95,6 +300,7 @@ if __name__ == "__main__":
     keyword0 = ['visit']
     regex(text0, keyword0, rule1)
     regex(text0, keyword0, rule2)
+    print(extract_sentences(text0, keyword0))
 
     text2 = textwrap.dedent("""
     Hi there, we are from an international company. We provide excellent
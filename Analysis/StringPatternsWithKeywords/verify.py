@@ -0,0 +1,115 @@
+#! /usr/bin/env python3
+import argparse
+import random
+import re
+import sys
+import textwrap
+
+from main import extract_sentences, regex_rules, sentence_spans
+
+proginfo = textwrap.dedent('''\
+    Check that sentence_spans of main.py finds the same spans as the
+    extract=2 regex rules.
+
+    Random texts made of keywords, near misses, periods and blanks are
+    scanned by sentence_spans and by re.finditer with the extract=2 rule of
+    each keyword. This covers the leading period of a sentence, the
+    rightmost keyword of a sentence, and keywords which can match a period.
+    The exit status is 1 if any span differs.
+''')
+
+# Keywords of the examples in main.py, and keywords spanning words or
+# matching periods
+keywords = [
+    'John|Max', 'games', 'visit', 'a', 'the play', 'x\\.y',
+    '(?:\\$?\\d+\\.?\\d?\\d?|price|charges?)(?: is| nett| per)?(?:/| per | an '
+    '| one | half | every | each )(?:unit|(?!hour |hr )\\w+)\\b']
+
+vocabulary = ['John', 'Max', 'Johnathan', 'games', 'visit', 'visits', 'a',
+              'the', 'play', 'the play', 'x.y', 'x', 'y', '$25', '2.5', '5',
+              'per', 'unit', '2.5 per', '5 per x', 'price is', 'per unit',
+              'an', 'hour', '.', '..', '. ', '\n', '  ']
+
+
+def random_text(rand, max_words=20):
+    """Text of random words of the vocabulary"""
+    words = [rand.choice(vocabulary)
+             for _ in range(rand.randint(0, max_words))]
+    return ''.join(word + rand.choice(['', ' ', ' ', '.', '\n'])
+                   for word in words)
+
+
+def regex_spans(text, words, flags=re.I):
+    """Spans of re.finditer with the extract=2 rule of each keyword"""
+    spans = []
+    for i, pattern in enumerate(regex_rules(words, 2)):
+        spans.extend((i, m.start(), m.end())
+                     for m in re.finditer(pattern, text, flags))
+    spans.sort(key=lambda span: (span[1], span[0]))
+    return spans
+
+
+def verify(num=20000, seed=10, words=keywords, max_words=20):
+    """Compare sentence_spans with the extract=2 regex on random texts.
+
+    Parameters
+    ----------
+    num : int, default 20000
+        Number of random texts.
+
+    seed : int, default 10
+        Seed of the random texts.
+
+    words : list
+        A list of keywords or regex patterns.
+
+    max_words : int, default 20
+        Maximum number of words of a text.
+
+    Returns
+    -------
+    mismatches : list
+        A list of (text, spans of sentence_spans, spans of the regex).
+    """
+    rand = random.Random(seed)
+    mismatches = []
+    for _ in range(num):
+        text = random_text(rand, max_words)
+        expected = regex_spans(text, words)
+        found = sentence_spans(text, words)
+        if found != expected:
+            mismatches.append((text, found, expected))
+            continue
+        for word in words:
+            # extract_sentences matches each keyword as re.findall does
+            pattern = regex_rules([word], 2)[0]
+            if extract_sentences(text, [word])[word] != re.findall(
+                    pattern, text, re.I):
+                mismatches.append((text, found, expected))
+                break
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=proginfo)
+    parser.add_argument('-n', '--num', type=int, default=20000,
+                        help='Number of random texts. Default (20000)')
+    parser.add_argument('-s', '--seed', type=int, default=10,
+                        help='Seed of the random texts. Default (10)')
+    parser.add_argument('-k', '--keyword', action='append', default=None,
+                        help='A keyword or regex pattern, may be repeated. '
+                        'Default (the keywords of verify.py)')
+    args = parser.parse_args(argv)
+
+    mismatches = verify(args.num, args.seed, args.keyword or keywords)
+    for text, found, expected in mismatches[:5]:
+        print("text: {!r}\nsentence_spans: {}\nregex: {}\n".format(
+            text, found, expected))
+    print("{} of {} texts differ".format(len(mismatches), args.num))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,16 @@
 """ DataIn class that can be used to load data .csv, followed by preprocessing"""
 
+import os
+import sys
 import pandas as pd
 from preprocess import summary, one2one
 from itertools import combinations, chain
+# The repository root, which provides the script package
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", ".."))
+from script.fingerprint import cached, column_hashes, diff
+from script.instrument import instrument
+from script.sketch import approx_nunique, group_estimates
 
 
 class DataIn(object):
@@ -13,6 +21,14 @@ class DataIn(object):
     fname : str 
         The filename of imported .csv file.
 
+    cache : dict, default None
+        If given, the approximate numbers of unique values and the one to
+        one checks of one2one_sets are stored in and reused from cache for
+        the columns whose values have not changed. Exact numbers of unique
+        values are cheaper than the fingerprints and are not cached.
+        The same cache can be shared by the DataIn objects of different
+        versions of a dataset.
+
     Attributes
     ----------
     df : pandas.DataFrame
@@ -24,18 +40,20 @@ class DataIn(object):
     ftype : str
         Imported file type, '.csv' in this case.
     """
-    def __init__(self, fname):
+    def __init__(self, fname, cache=None):
         try:
             ftype = fname[-4:]
             assert(ftype == '.csv')
             self.df = pd.read_csv(fname)
             self.fname = fname
             self.ftype = ftype
+            self.cache = cache
         except AssertionError:
             print("\nImported file type is not .csv!\n")
             raise
         self.check()
 
+    @instrument
     def check(self):
         """Check the  missing value or NaN (Not a Number) record found in the data.
 
@@ -53,6 +71,7 @@ class DataIn(object):
         if (warn == 0):
             print("No missing values in the columns of %s!\n" % self.fname)
 
+    @instrument
     def numeric(self, clean=True):
         """Convert the features with partial numeric records to numeric type.
 
@@ -78,6 +97,7 @@ class DataIn(object):
         if clean:
             self.df = self.df.dropna()
 
+    @instrument
     def summarize(self):
         """Provide the summary of your text and numeric data.
 
@@ -85,42 +105,80 @@ class DataIn(object):
         """
         summary(self.df)
 
-    def unique_sets(self):
+    @instrument
+    def unique_sets(self, approx=False, error=0.01):
         """Check the columns that share the same total number of unique values.
 
         Calling this function prints out the total number of unique values 
         and their corresponding features.
 
+        Parameters
+        ----------
+        approx : boolean, default False
+            If True, estimate the number of unique values with HyperLogLog
+            sketches, and group the features whose estimates are within the
+            error bound, see script.sketch
+
+        error : float, default 0.01
+            Relative standard error of the estimates if approx is True
+
         Returns
         -------
         uniq : dict
             Dictionary with the total number of unique values as keys,
             features sharing the same set of number as values.
         """
+        hashes = (column_hashes(self.df)
+                  if self.cache is not None and approx else None)
+        return self._unique_sets(approx, error, hashes)
+
+    def _unique_sets(self, approx, error, hashes):
+        """unique_sets with the column hashes computed by the caller"""
         colnames = self.df.columns
         uniq = {}
-        for x in colnames:
-            total = self.df[x].nunique()
-            # Create a list to record the columns sharing the same number
-            # of unique values
-            if total not in uniq.keys():
-                uniq[total] = []
-                uniq[total].append(x)
-            else:
-                uniq[total].append(x)
+        if approx:
+            estimates = {}
+            for x in colnames:
+                key = (('approx', error, hashes[x])
+                       if hashes is not None else None)
+                estimates[x] = cached(
+                    self.cache, key,
+                    lambda: approx_nunique(self.df[x], error))
+            uniq = group_estimates(estimates, error)
+        else:
+            for x in colnames:
+                total = self.df[x].nunique()
+                # Create a list to record the columns sharing the same number
+                # of unique values
+                if total not in uniq.keys():
+                    uniq[total] = []
+                    uniq[total].append(x)
+                else:
+                    uniq[total].append(x)
 
         print("-"*80)
         print("Number of unique values and their corresponding features")
         print("-"*80)
         for k in uniq.keys():
-            print("Number of unique values: {}, Features: {}".format(
-                k, uniq[k]))
+            print("Number of unique values: {}{}, Features: {}".format(
+                "~" if approx else "", k, uniq[k]))
 
         return uniq
 
-    def one2one_sets(self):
+    @instrument
+    def one2one_sets(self, approx=False, error=0.01):
         """Identify one to one correspondence relationship.
 
+        Parameters
+        ----------
+        approx : boolean, default False
+            If True, the candidate features are grouped by their approximate
+            numbers of unique values, which are only counted exactly for the
+            groups having more than one feature
+
+        error : float, default 0.01
+            Relative standard error of the estimates if approx is True
+
         Returns
         -------
         dict_one2one : dict
@@ -128,7 +186,24 @@ class DataIn(object):
             correspondence, if available. 
             Each set is grouped by the key of dictionary.
         """
-        uniq = self.unique_sets()
+        # each column is fingerprinted at most once per call
+        hashes = (column_hashes(self.df)
+                  if self.cache is not None and approx else None)
+        uniq = self._unique_sets(approx, error, hashes)
+        if approx:
+            # Confirm the candidates sharing similar estimates by exact
+            # counts, in the order of the columns as in the exact mode
+            grouped = {x for v in uniq.values() if len(v) > 1 for x in v}
+            exact = {}
+            for x in self.df.columns:
+                if x in grouped:
+                    exact.setdefault(self.df[x].nunique(), []).append(x)
+            uniq = exact
+        if self.cache is not None and hashes is None:
+            # only the pairwise checks, which cost more than the
+            # fingerprints, are cached
+            hashes = column_hashes(self.df[
+                [x for v in uniq.values() if len(v) > 1 for x in v]])
 
         print('*'*10 + ' '*10 + "Conclusion for one to one correspondence" +
                 " "*10 + "*"*10)
@@ -137,7 +212,10 @@ class DataIn(object):
             if len(v) > 1:
                 pairs = []
                 for x in combinations(v, 2):
-                    if one2one(self.df[[x[0], x[1]]]):
+                    key = (('one2one', hashes[x[0]], hashes[x[1]])
+                           if hashes is not None else None)
+                    if cached(self.cache, key,
+                              lambda: one2one(self.df[[x[0], x[1]]])):
                         pairs.append(x)
 
                 # If no pair of features which are one to one correspondent
@@ -166,3 +244,23 @@ class DataIn(object):
                         print("Features {} are one to one correspondence.".
                                 format(v))
                 return dict_one2one
+
+    def diff(self, other, key=None):
+        """Compare the data with another version of the dataset.
+
+        Parameters
+        ----------
+        other : DataIn
+            Another version of the dataset
+
+        key : list, default None
+            Columns which identify the rows. If None, the rows are
+            identified by the index
+
+        Returns
+        -------
+        changes : dict
+            Added, removed and changed rows and columns of other with
+            respect to this data, see script.fingerprint.diff
+        """
+        return diff(self.df, other.df, key)
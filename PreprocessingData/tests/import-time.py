@@ -0,0 +1,57 @@
+""" Check that importing script.preprocess stays light: the plotting and
+scipy modules are imported by the functions using them, not at import.
+
+Usage: python import-time.py [budget in seconds, default 0.1]
+"""
+
+import os
+import subprocess
+import sys
+
+# Modules which must not be imported by script.preprocess
+heavy = ["matplotlib", "seaborn", "scipy"]
+# Seconds allowed for importing script.preprocess once numpy and pandas,
+# which it needs anyway, are imported
+budget = 0.1
+
+# Run in a fresh interpreter so that no module is imported beforehand
+child = """
+import sys, time
+import numpy, pandas
+start = time.perf_counter()
+import script.preprocess
+print(time.perf_counter() - start)
+print(" ".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def import_time(root, heavy=heavy):
+    """Import script.preprocess in a fresh interpreter.
+
+    Returns
+    -------
+    seconds : float
+        Import time of script.preprocess
+
+    loaded : list
+        The heavy modules found in sys.modules after the import
+    """
+    out = subprocess.check_output(
+        [sys.executable, "-c", child.format(heavy=heavy)], cwd=root,
+        universal_newlines=True)
+    lines = out.splitlines()
+    loaded = lines[1].split() if len(lines) > 1 else []
+    return float(lines[0]), loaded
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        budget = float(sys.argv[1])
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "..", "..")
+    # best of a few runs, the first may be slowed by a cold disk cache
+    seconds, loaded = min(import_time(root) for _ in range(3))
+    print("import script.preprocess: {:.3f} s (budget {:.3f} s)".format(
+        seconds, budget))
+    assert not loaded, "heavy modules imported: {}".format(loaded)
+    assert seconds < budget, "import time over budget"
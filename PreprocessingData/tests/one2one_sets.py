@@ -1,17 +1,47 @@
 """ train.csv and weather.csv files downloaded from
 https://www.kaggle.com/c/predict-west-nile-virus/data """
 
+import os
 import sys
+import tempfile
 sys.path.append("../bin/")
+import numpy as np
+import pandas as pd
 from data import DataIn
 # from preprocess import one2one
 
+
+def check_approx(data, error=0.01):
+    """Check that the approximate mode finds the same sets as the exact"""
+    exact = data.one2one_sets()
+    approx = data.one2one_sets(approx=True, error=error)
+    assert exact == approx, "approx {} != exact {}".format(approx, exact)
+
+
+def synthetic(seed, dirname, n=3000):
+    """Columns of close numbers of unique values, with B and C one to one"""
+    rng = np.random.RandomState(seed)
+    b = rng.randint(0, 1000, n)
+    fname = os.path.join(dirname, "synthetic.csv")
+    pd.DataFrame({"A": rng.randint(0, 960, n), "B": b,
+                  "C": ["c{}".format(x) for x in b]}).to_csv(fname,
+                                                             index=False)
+    return DataIn(fname)
+
+
 if __name__ == "__main__":
     train = DataIn("train.csv")
     train.one2one_sets()
+    check_approx(train)
 
     corrupted = DataIn("train-corrupted.csv")
     corrupted.one2one_sets()
+    check_approx(corrupted)
 
     weather = DataIn("weather.csv")
     weather.one2one_sets()
+    check_approx(weather)
+
+    with tempfile.TemporaryDirectory() as dirname:
+        for seed in range(50):
+            check_approx(synthetic(seed, dirname))
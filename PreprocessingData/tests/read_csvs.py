@@ -0,0 +1,41 @@
+""" train.csv and weather.csv files downloaded from
+https://www.kaggle.com/c/predict-west-nile-virus/data """
+
+import os
+import sys
+import tempfile
+sys.path.append("../..")
+import pandas as pd
+from script.loader import read_csvs
+
+
+def serial_merge(fnames, key="Date"):
+    """Merge the files read one after the other with parse_dates"""
+    train, weather = [pd.read_csv(f, parse_dates=[key]) for f in fnames]
+    # read_csvs sorts by the key, keeping the order of the rows otherwise
+    train = train.sort_values(key, kind="mergesort")
+    return train.merge(weather, on=key).reset_index(drop=True)
+
+
+def check_merge(fnames, expected, key="Date"):
+    """Check the merge of the DataFrames of read_csvs on the shared key"""
+    train, weather = read_csvs(fnames, key)
+    assert train[key].dtype == weather[key].dtype
+    merged = train.merge(weather, on=key).reset_index(drop=True)
+    merged[key] = merged[key].astype(expected[key].dtype)
+    pd.testing.assert_frame_equal(merged, expected)
+
+
+if __name__ == "__main__":
+    fnames = ["train.csv", "weather.csv"]
+    expected = serial_merge(fnames)
+    check_merge(fnames, expected)
+
+    # The same dates formatted differently in the two files
+    with tempfile.TemporaryDirectory() as dirname:
+        weather = pd.read_csv("weather.csv", dtype={"Date": str})
+        weather["Date"] = weather["Date"] + " 00:00:00"
+        fname = os.path.join(dirname, "weather.csv")
+        weather.to_csv(fname, index=False)
+        check_merge(["train.csv", fname], expected)
+    print("read_csvs: merges on Date match the serial merge")
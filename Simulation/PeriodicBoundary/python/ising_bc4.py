@@ -0,0 +1,70 @@
+#! /usr/bin/env python3
+import textwrap
+import argparse
+import numpy as np
+import time
+
+proginfo = textwrap.dedent('''\
+    This python script compares the efficiencies of different schemes
+    implementing the periodic boundary conditions for Ising model problem.
+
+    Author: JQ e-mail: gohjingqiang [at] gmail.com
+    Date:   29-10-2014
+''')
+
+parser = argparse.ArgumentParser(
+    formatter_class=argparse.RawDescriptionHelpFormatter,
+    description=proginfo)
+parser.add_argument('-l', '--L', type=int, default=10,
+                    help='L, the number of spin along the edges of a \
+                    2D square lattice, an even number. Default (10)')
+parser.add_argument('-n', '--num', type=int, default=100,
+                    help='The total number of Monte Carlo sweeps. \
+                    Default (100)')
+args = parser.parse_args()
+if args.L % 2:
+    # the checkerboard of an odd lattice has neighbors of the same color
+    # across the periodic boundary
+    parser.error('L must be even for the checkerboard update')
+
+start = time.time()
+# Initialize the system
+L = args.L
+print(L)
+# 2D square lattice, spin up, with a border of ghost cells holding the
+# periodic images of the opposite edges
+pad = np.ones((L + 2, L + 2))
+spin = pad[1:-1, 1:-1]  # view of the L x L lattice
+T = 300  # 300 K, for temperature
+
+# Method 4, using ghost cells refreshed after each half-sweep.
+# The spins of one color of the checkerboard do not neighbor each other, so
+# they are updated all at once. The update order differs from the sequential
+# sweep of methods 1-3, hence a different (but equally valid) Markov chain.
+i, j = np.indices((L, L))
+colors = [(i + j) % 2 == c for c in (0, 1)]
+rng = np.random.default_rng(10)
+for k in range(args.num):
+    for color in colors:
+        # eflip, the change in the energy of system if we flip the spins.
+        # The 4 neighbors are views shifted by one cell, the ghost cells
+        # providing the neighbors across the boundaries.
+        eflip = 2*spin*(
+            pad[:-2, 1:-1] +  # -1 in i-dimension
+            pad[2:, 1:-1] +   # +1 in i-dimension
+            pad[1:-1, :-2] +  # -1 in j-dimension
+            pad[1:-1, 2:]     # +1 in j-dimension
+        )
+        # Metropolis algorithm
+        flip = color & ((eflip <= 0.0) |
+                        (rng.random((L, L)) < np.exp(-1.0*eflip/T)))
+        spin[flip] = -1.0*spin[flip]
+        # Refresh the ghost cells by copying the opposite edges
+        pad[0, 1:-1] = pad[L, 1:-1]
+        pad[L + 1, 1:-1] = pad[1, 1:-1]
+        pad[:, 0] = pad[:, L]
+        pad[:, L + 1] = pad[:, 1]
+
+end = time.time()
+print(spin)
+print(end - start)
@@ -0,0 +1,362 @@
+""" Functions for the bus records of the MTA feed, e.g. bus bunching.
+
+See posts/VisualizeBusBunching.ipynb for the data set and an example.
+"""
+import os
+import re
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Columns of the MTA feed used by the analysis of bus bunching
+feed_columns = ["RecordedAtTime", "DirectionRef", "PublishedLineName",
+                "NextStopPointName", "ArrivalProximityText", "VehicleRef",
+                "VehicleLocation.Longitude", "VehicleLocation.Latitude"]
+# Columns identifying a record of a vehicle
+vehicle_keys = ["RecordedAtTime", "PublishedLineName", "DirectionRef",
+                "VehicleRef"]
+# Columns identifying the buses of a service heading to the same stop
+stop_keys = ["RecordedAtTime", "PublishedLineName", "DirectionRef",
+             "NextStopPointName"]
+# Columns of the bus records served to the map, keyed by the names used in
+# the data sources of the visualization
+source_columns = {"lon": "VehicleLocation.E",
+                  "lat": "VehicleLocation.N",
+                  "PublishedLineName": "PublishedLineName",
+                  "DirectionRef": "DirectionRef",
+                  "VehicleRef": "VehicleRef",
+                  "RecordedAtTime": "RecordedAtTime",
+                  "NextStopPoint": "NextStopPointName"}
+
+
+def ingest_feed(fname, outdir, start=None, end=None, columns=None,
+                chunksize=1000000, time_format="%Y-%m-%d %H:%M:%S"):
+    """Stream the MTA feed into a day-partitioned Parquet store.
+
+    The .csv file is read by chunks and only for the required columns.
+    Each chunk is filtered by the time range and for missing values, then
+    written to outdir/day=YYYY-MM-DD/<name>-NNNNN.parquet, where name is
+    the file name of the feed without extension, so that the peak memory
+    is that of a chunk. Writing Parquet files requires pyarrow or
+    fastparquet.
+
+    The parts are written to a temporary directory first, then replace
+    all the parts of the same feed in the store, so that ingesting a feed
+    again leaves no stale part, while the parts of other feeds are kept.
+
+    Parameters
+    ----------
+    fname : str
+        File name of the feed, e.g. mta_1706.csv
+
+    outdir : str
+        Directory of the store
+
+    start : datetime-like, default None
+        If given, keep the records after start (exclusive)
+
+    end : datetime-like, default None
+        If given, keep the records before end (exclusive)
+
+    columns : list, default None
+        Columns read from the feed, default to feed_columns. Records with
+        missing values in any of these columns are removed.
+
+    chunksize : int, default 1000000
+        Number of rows of a chunk
+
+    time_format : str, default "%Y-%m-%d %H:%M:%S"
+        Format of RecordedAtTime, parsed without inferring the format
+
+    Returns
+    -------
+    counts : dict
+        Dictionary with the dates (str) as keys, numbers of records
+        written as values
+
+    Raises
+    ------
+    ValueError
+        If a value of RecordedAtTime does not match time_format, in which
+        case the store is left unchanged
+    """
+    columns = feed_columns if columns is None else columns
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+    name = os.path.splitext(os.path.basename(fname))[0]
+    counts = {}
+    os.makedirs(outdir, exist_ok=True)
+    # hidden from load_days, which only reads the day= directories
+    tmpdir = tempfile.mkdtemp(prefix=".ingest-", dir=outdir)
+    try:
+        reader = pd.read_csv(fname, usecols=columns, chunksize=chunksize)
+        for number, chunk in enumerate(reader):
+            times = pd.to_datetime(chunk["RecordedAtTime"],
+                                   format=time_format, errors="coerce")
+            invalid = times.isnull() & chunk["RecordedAtTime"].notnull()
+            if invalid.any():
+                raise ValueError(
+                    "{} values of RecordedAtTime do not match {!r}, e.g. "
+                    "{!r}".format(invalid.sum(), time_format,
+                                  chunk["RecordedAtTime"][invalid].iloc[0]))
+            # records without RecordedAtTime are removed with the other
+            # missing values
+            keep = times.notnull()
+            if start is not None:
+                keep &= times > start
+            if end is not None:
+                keep &= times < end
+            chunk = chunk[keep].assign(RecordedAtTime=times[keep])
+            chunk = chunk.dropna(axis=0, how="any")
+            days = chunk["RecordedAtTime"].dt.strftime("%Y-%m-%d")
+            for day, part in chunk.groupby(days.values):
+                daydir = os.path.join(tmpdir, "day=" + day)
+                os.makedirs(daydir, exist_ok=True)
+                part.to_parquet(os.path.join(
+                    daydir, "{}-{:05d}.parquet".format(name, number)),
+                    index=False)
+                counts[day] = counts.get(day, 0) + len(part)
+        _replace_parts(outdir, tmpdir, name)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return counts
+
+
+def _replace_parts(outdir, tmpdir, name):
+    """Replace the parts of a feed in outdir by those written in tmpdir"""
+    pattern = re.compile(re.escape(name) + r"-\d+\.parquet")
+    for daydir in _day_dirs(outdir):
+        for fname in os.listdir(daydir):
+            if pattern.fullmatch(fname):
+                os.remove(os.path.join(daydir, fname))
+    for daydir in _day_dirs(tmpdir):
+        target = os.path.join(outdir, os.path.basename(daydir))
+        os.makedirs(target, exist_ok=True)
+        for fname in os.listdir(daydir):
+            os.replace(os.path.join(daydir, fname),
+                       os.path.join(target, fname))
+    for daydir in _day_dirs(outdir):
+        if not os.listdir(daydir):
+            os.rmdir(daydir)
+
+
+def _day_dirs(outdir):
+    """Sorted paths of the day partitions of a store"""
+    return [os.path.join(outdir, x) for x in sorted(os.listdir(outdir))
+            if x.startswith("day=")]
+
+
+def load_days(outdir, start=None, end=None, columns=None):
+    """Load the records of a range of days from the store of ingest_feed.
+
+    Parameters
+    ----------
+    outdir : str
+        Directory of the store
+
+    start : datetime-like, default None
+        If given, the first day loaded
+
+    end : datetime-like, default None
+        If given, the last day loaded (inclusive)
+
+    columns : list, default None
+        If given, load only these columns
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        Records of the days, sorted by day
+    """
+    first = None if start is None else pd.Timestamp(start).strftime("%Y-%m-%d")
+    last = None if end is None else pd.Timestamp(end).strftime("%Y-%m-%d")
+    parts = []
+    for daydir in _day_dirs(outdir):
+        day = os.path.basename(daydir)[len("day="):]
+        if (first is not None and day < first) or (
+                last is not None and day > last):
+            continue
+        for fname in sorted(os.listdir(daydir)):
+            parts.append(pd.read_parquet(os.path.join(daydir, fname),
+                                         columns=columns))
+    if not parts:
+        return pd.DataFrame(columns=columns or feed_columns)
+    return pd.concat(parts, ignore_index=True)
+
+
+def bunched_status(df, at_stop="at stop"):
+    """Flag the bus records involved in bus bunching.
+
+    Bus bunching refers to buses of the same service number arriving at
+    the same stop at the same time. Duplicate records of a vehicle (e.g.
+    due to different scheduled arrival times) are removed first.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Bus records having the columns of vehicle_keys, stop_keys and
+        ArrivalProximityText
+
+    at_stop : str, default "at stop"
+        Value of ArrivalProximityText for a bus at the stop
+
+    Returns
+    -------
+    bus_df : pandas.DataFrame
+        The first record of each vehicle, with the column BunchedStatus
+        True if more than one bus of the same stop_keys is at the stop
+    """
+    bus_df = df.groupby(vehicle_keys).head(1).copy()
+    is_at_stop = (bus_df["ArrivalProximityText"] == at_stop).astype(int)
+    # number of buses at the stop sharing the stop_keys of each record
+    counts = is_at_stop.groupby([bus_df[x] for x in stop_keys]).transform(
+        'sum')
+    bus_df["BunchedStatus"] = (counts > 1).values
+    return bus_df
+
+
+def time_interval(times, freq="30s"):
+    """Floor the recorded times to intervals, e.g. of 30 seconds.
+
+    Parameters
+    ----------
+    times : pandas.Series
+        Datetime-like Series, e.g. RecordedAtTime
+
+    freq : str, default "30s"
+        Length of the intervals
+
+    Returns
+    -------
+    intervals : pandas.Series
+    """
+    return pd.to_datetime(times).dt.floor(freq)
+
+
+def _ns(values):
+    """Datetime values as int64 nanoseconds"""
+    return np.asarray(values).astype('datetime64[ns]').astype(np.int64)
+
+
+class TimeIndex(object):
+    """An index of the bus records by time interval and bunched status.
+
+    The records of a time interval are served by slicing precomputed column
+    arrays, in time proportional to the number of records of the interval,
+    e.g. to update an interactive map when a slider moves. Records can be
+    added incrementally as new feed data arrives.
+
+    Parameters
+    ----------
+    freq : str, default "30s"
+        Length of the time intervals
+
+    columns : dict, default None
+        Dictionary with the names of the served columns as keys, the
+        columns of the bus records as values. Default to source_columns.
+
+    Attributes
+    ----------
+    slices : dict
+        Dictionary with (interval in ns, bunched status) as keys, lists of
+        (chunk number, start, stop) as values
+
+    chunks : list
+        A list of the dictionaries of column arrays added by update, sorted
+        by interval and bunched status
+    """
+    def __init__(self, freq="30s", columns=None):
+        self.freq = freq
+        self.columns = dict(source_columns if columns is None else columns)
+        self.slices = {}
+        self.chunks = []
+
+    def update(self, bus_df):
+        """Add bus records to the index.
+
+        Parameters
+        ----------
+        bus_df : pandas.DataFrame
+            Bus records having the columns RecordedAtTime, BunchedStatus
+            (see bunched_status) and the served columns
+        """
+        if bus_df.empty:
+            return
+        intervals = _ns(time_interval(bus_df["RecordedAtTime"], self.freq))
+        bunched = bus_df["BunchedStatus"].values.astype(bool)
+        order = np.lexsort((bunched, intervals))
+        intervals = intervals[order]
+        bunched = bunched[order]
+        chunk = {name: bus_df[col].to_numpy()[order]
+                 for name, col in self.columns.items()}
+        number = len(self.chunks)
+        self.chunks.append(chunk)
+
+        change = np.flatnonzero((intervals[1:] != intervals[:-1]) |
+                                (bunched[1:] != bunched[:-1])) + 1
+        starts = np.r_[0, change]
+        stops = np.r_[change, len(order)]
+        for start, stop in zip(starts, stops):
+            key = (int(intervals[start]), bool(bunched[start]))
+            self.slices.setdefault(key, []).append((number, start, stop))
+
+    def intervals(self):
+        """Sorted time intervals having records.
+
+        Returns
+        -------
+        intervals : list
+            A list of pandas.Timestamp
+        """
+        return [pd.Timestamp(x) for x in sorted({k[0] for k in self.slices})]
+
+    def records(self, time, bunched):
+        """Column arrays of the records of a time interval.
+
+        Parameters
+        ----------
+        time : datetime-like
+            Any time within the interval, e.g. "2017-06-01 12:44:00"
+
+        bunched : boolean
+            Bunched status of the records
+
+        Returns
+        -------
+        data : dict
+            Dictionary with the served column names as keys, arrays as
+            values, e.g. the data of a bokeh ColumnDataSource
+        """
+        key = (pd.Timestamp(time).floor(self.freq).value, bool(bunched))
+        parts = self.slices.get(key, [])
+        data = {}
+        for name in self.columns:
+            arrays = [self.chunks[i][name][start:stop]
+                      for i, start, stop in parts]
+            if len(arrays) == 1:
+                data[name] = arrays[0]
+            elif arrays:
+                data[name] = np.concatenate(arrays)
+            else:
+                data[name] = self.chunks[0][name][:0] if self.chunks else []
+        return data
+
+    def sources(self, time):
+        """Data of the bunched and non-bunched buses of a time interval.
+
+        Parameters
+        ----------
+        time : datetime-like
+            Any time within the interval
+
+        Returns
+        -------
+        bunched : dict
+            Column arrays of the bunched buses
+
+        non_bunched : dict
+            Column arrays of the other buses
+        """
+        return self.records(time, True), self.records(time, False)
@@ -0,0 +1,134 @@
+""" Fingerprints of rows and columns to detect changes between datasets."""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+
+def row_hashes(df, key=None):
+    """Hash each row of a DataFrame.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        DataFrame of your data
+
+    key : list, default None
+        Columns which identify the rows. If None, the rows are identified
+        by the index of df
+
+    Returns
+    -------
+    hashes : pandas.Series
+        uint64 hashes of the rows (excluding the key columns), indexed by
+        the row identifiers
+    """
+    if key is not None:
+        df = df.set_index(key)
+    assert df.index.is_unique, "The rows are not uniquely identified"
+    return pd.util.hash_pandas_object(df, index=False)
+
+
+def column_hashes(df):
+    """Fingerprint the values of each column of a DataFrame in row order.
+
+    Columns of numpy numeric or datetime dtypes are hashed from their raw
+    bytes. Other columns are factorized, and the codes are hashed with the
+    hashes of the unique values, which is cheaper than hashing every value.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        DataFrame of your data
+
+    Returns
+    -------
+    hashes : dict
+        Dictionary with the column names as keys, hexadecimal digests of
+        the column dtypes and values as values
+    """
+    hashes = {}
+    for x in df.columns:
+        y = df[x]
+        sha = hashlib.sha1(str(y.dtype).encode())
+        if isinstance(y.dtype, np.dtype) and y.dtype.kind in 'biufcmM':
+            sha.update(np.ascontiguousarray(y.values).view(np.uint8))
+        else:
+            codes, uniques = pd.factorize(y)
+            sha.update(codes.astype(np.int64))
+            uniques = np.asarray(uniques, dtype=object)
+            sha.update(pd.util.hash_array(uniques))
+            if y.dtype == object:
+                # hash_array does not tell apart e.g. 1 and '1'
+                sha.update(' '.join(type(v).__name__
+                                    for v in uniques).encode())
+        hashes[x] = sha.hexdigest()
+    return hashes
+
+
+def cached(cache, key, func):
+    """Return cache[key], evaluating and storing func() if key is not found.
+
+    Parameters
+    ----------
+    cache : dict, or None
+        Cached results. If None, func() is always evaluated
+
+    key : hashable
+        Key of the result, e.g. built from the column hashes
+
+    func : callable
+        Function evaluating the result
+    """
+    if cache is None:
+        return func()
+    if key not in cache:
+        cache[key] = func()
+    return cache[key]
+
+
+def diff(old, new, key=None):
+    """Compare two versions of a dataset by rows and columns.
+
+    Rows are compared on the columns shared by both versions.
+
+    Parameters
+    ----------
+    old : pandas.DataFrame
+        Previous version of the data
+
+    new : pandas.DataFrame
+        New version of the data
+
+    key : list, default None
+        Columns which identify the rows. If None, the rows are identified
+        by the index
+
+    Returns
+    -------
+    changes : dict
+        Dictionary with keys
+        added_rows, removed_rows, changed_rows: pandas.Index of the row
+        identifiers
+        added_columns, removed_columns, changed_columns: list of the
+        column names
+    """
+    common = [x for x in new.columns if x in old.columns]
+    shared = common if key is None else list(key) + [
+        x for x in common if x not in key]
+    old_rows = row_hashes(old[shared], key)
+    new_rows = row_hashes(new[shared], key)
+    both = new_rows.index.intersection(old_rows.index)
+    changed = new_rows[both].values != old_rows[both].values
+
+    old_cols = column_hashes(old)
+    new_cols = column_hashes(new)
+    return {
+        'added_rows': new_rows.index.difference(old_rows.index),
+        'removed_rows': old_rows.index.difference(new_rows.index),
+        'changed_rows': both[changed],
+        'added_columns': [x for x in new.columns if x not in old_cols],
+        'removed_columns': [x for x in old.columns if x not in new_cols],
+        'changed_columns': [x for x in common
+                            if old_cols[x] != new_cols[x]],
+    }
@@ -0,0 +1,50 @@
+""" Functions for geographic coordinates, e.g. map projections."""
+import numpy as np
+import pandas as pd
+
+# Radius of the WGS 84 ellipsoid used by the Web Mercator projection
+earth_radius = 6378137.0
+
+
+def lonlat_to_mercator(lon, lat):
+    """Convert longitude/latitude (EPSG:4326) to Web Mercator (EPSG:3857)
+    easting/northing, as used by Bokeh for the tile maps.
+
+    Parameters
+    ----------
+    lon : array-like, 1-dimensional
+        Longitudes in degrees
+
+    lat : array-like, 1-dimensional
+        Latitudes in degrees
+
+    Returns
+    -------
+    easting : numpy.ndarray
+        Easting in meters, NaN for invalid coordinates
+
+    northing : numpy.ndarray
+        Northing in meters, NaN for invalid coordinates
+
+    Notes
+    -----
+    Coordinates are invalid if missing, non-numeric, or outside the ranges
+    of longitude [-180, 180] and latitude (-90, 90).
+    """
+    lon = _as_float(lon)
+    lat = _as_float(lat)
+    with np.errstate(invalid='ignore'):
+        valid = (np.isfinite(lon) & np.isfinite(lat) &
+                 (np.abs(lon) <= 180) & (np.abs(lat) < 90))
+    easting = np.full(lon.shape, np.nan)
+    northing = np.full(lat.shape, np.nan)
+    easting[valid] = earth_radius * np.radians(lon[valid])
+    northing[valid] = earth_radius * np.log(
+        np.tan(np.pi / 4 + np.radians(lat[valid]) / 2))
+    return easting, northing
+
+
+def _as_float(values):
+    """Convert values to a float array, non-numeric values as NaN"""
+    return pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(
+        dtype=float, na_value=np.nan)
@@ -0,0 +1,142 @@
+""" Opt-in instrumentation of the wall time and memory of function calls."""
+import functools
+import json
+import time
+import tracemalloc
+
+# Shared state of the instrumentation, disabled by default
+_state = {'enabled': False, 'memory': False, 'started': False}
+# Records of the instrumented calls
+records = []
+# Stack of the instrumented calls in progress, used for nested calls
+_stack = []
+
+
+def enable(memory=True):
+    """Start recording the instrumented calls.
+
+    Parameters
+    ----------
+    memory : boolean, default True
+        If True, trace the peak memory of each call with tracemalloc. A
+        trace started by the caller is left running by disable.
+    """
+    _state['enabled'] = True
+    _state['memory'] = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _state['started'] = True
+
+
+def disable():
+    """Stop recording the instrumented calls."""
+    _state['enabled'] = False
+    if _state['started'] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _state['memory'] = False
+    _state['started'] = False
+
+
+def reset():
+    """Remove all the records."""
+    del records[:]
+
+
+def _shape(args):
+    """Rows and columns of the first DataFrame-like argument"""
+    for arg in args:
+        shape = getattr(arg, 'shape', None)
+        if shape is None:
+            # e.g. DataIn object which holds its DataFrame as df
+            shape = getattr(getattr(arg, 'df', None), 'shape', None)
+        if shape is not None:
+            return shape[0], (shape[1] if len(shape) > 1 else 1)
+    return None, None
+
+
+def instrument(func):
+    """Decorator recording the calls of func when instrumentation is enabled.
+
+    Each record has the name of the function, the wall time in seconds,
+    the peak memory in bytes allocated during the call (None if memory is
+    not traced), and the rows and columns of the first DataFrame-like
+    argument.
+    """
+    name = "{}.{}".format(func.__module__, func.__qualname__)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _state['enabled']:
+            return func(*args, **kwargs)
+
+        memory = _state['memory'] and tracemalloc.is_tracing()
+        if memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if _stack:
+                _stack[-1]['peak'] = max(_stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            _stack.append({'peak': 0})
+        rows, cols = _shape(args)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            wall = time.perf_counter() - start
+            peak_memory = None
+            if memory:
+                peak = max(_stack.pop()['peak'],
+                           tracemalloc.get_traced_memory()[1])
+                if _stack:
+                    _stack[-1]['peak'] = max(_stack[-1]['peak'], peak)
+                peak_memory = peak - current
+            records.append({'name': name, 'wall': wall,
+                            'peak_memory': peak_memory,
+                            'rows': rows, 'cols': cols})
+    return wrapper
+
+
+def table(aggregate=True):
+    """Tabulate the records.
+
+    Parameters
+    ----------
+    aggregate : boolean, default True
+        If True, aggregate the records by the names of functions
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        Records of the calls, or the number of calls, total and mean wall
+        time, maximum peak memory and maximum rows of each function
+    """
+    import pandas as pd
+    df = pd.DataFrame(records, columns=['name', 'wall', 'peak_memory',
+                                        'rows', 'cols'])
+    if not aggregate:
+        return df
+    return df.groupby('name').agg(
+        calls=('wall', 'size'),
+        total_wall=('wall', 'sum'),
+        mean_wall=('wall', 'mean'),
+        max_peak_memory=('peak_memory', 'max'),
+        max_rows=('rows', 'max')).sort_values('total_wall', ascending=False)
+
+
+def dump(fname=None):
+    """Dump the records as JSON.
+
+    Parameters
+    ----------
+    fname : str, default None
+        If given, write the JSON to fname
+
+    Returns
+    -------
+    text : str
+        JSON of the records
+    """
+    text = json.dumps(records, indent=2)
+    if fname is not None:
+        with open(fname, 'w') as f:
+            f.write(text)
+    return text
@@ -0,0 +1,104 @@
+""" Load several .csv files concurrently with shared join keys."""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+def _read(fname, key, kwargs):
+    """Read a .csv file, keeping the key column as raw strings"""
+    dtype = dict(kwargs.pop('dtype', {}))
+    dtype[key] = str
+    return pd.read_csv(fname, dtype=dtype, **kwargs)
+
+
+def key_dtype(values, parse_dates=True):
+    """Build the shared categories of key values.
+
+    Raw values which differ but parse to the same value, e.g. "2007-05-29"
+    and "2007-05-29 00:00:00", share the same category.
+
+    Parameters
+    ----------
+    values : list
+        A list of arrays of the raw key values
+
+    parse_dates : boolean, default True
+        If True, parse the key values as datetime
+
+    Returns
+    -------
+    raw : numpy.ndarray
+        Unique raw key values
+
+    codes : numpy.ndarray
+        Category code of each of the raw values
+
+    dtype : pandas.CategoricalDtype
+        Ordered categories of the unique (parsed) key values
+    """
+    raw = pd.unique(np.concatenate(values))
+    raw = raw[pd.notnull(raw)]
+    parsed = _parse_dates(raw) if parse_dates else pd.Index(raw)
+    categories = parsed.unique().sort_values()
+    codes = categories.get_indexer(parsed)
+    return raw, codes, pd.CategoricalDtype(categories, ordered=True)
+
+
+def _parse_dates(raw):
+    """Parse the raw key values as datetime"""
+    try:
+        return pd.DatetimeIndex(pd.to_datetime(raw))
+    except ValueError:
+        # the sources format the dates differently, parse value by value
+        return pd.DatetimeIndex([pd.Timestamp(x) for x in raw])
+
+
+def read_csvs(fnames, key='Date', parse_dates=True, max_workers=None,
+              **kwargs):
+    """Load .csv files concurrently, sharing the categories of a join key.
+
+    The key column of every file is parsed once for the union of its raw
+    values, which may be formatted differently between the files, and is
+    stored as a categorical column with the same ordered categories in
+    all the DataFrames. Each DataFrame is sorted by the key,
+    so that the DataFrames can be merged on the key without realignment,
+    e.g. train.merge(weather, on='Date').
+
+    Parameters
+    ----------
+    fnames : list
+        A list of the file names of .csv files
+
+    key : str, default 'Date'
+        Name of the column shared by the files
+
+    parse_dates : boolean, default True
+        If True, the key values are parsed as datetime
+
+    max_workers : int, default None
+        Number of threads used to parse the files
+
+    **kwargs
+        Additional arguments of pandas.read_csv
+
+    Returns
+    -------
+    frames : list
+        A list of pandas.DataFrame in the order of fnames
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = list(executor.map(lambda f: _read(f, key, dict(kwargs)),
+                                   fnames))
+
+    raw, raw_codes, dtype = key_dtype([df[key].values for df in frames],
+                                      parse_dates)
+    raw_dtype = pd.CategoricalDtype(raw)
+    for i, df in enumerate(frames):
+        # positions in raw, -1 for missing values, mapped to the categories
+        codes = df[key].astype(raw_dtype).cat.codes.values
+        codes = np.where(codes >= 0, raw_codes[codes], -1)
+        df[key] = pd.Categorical.from_codes(codes, dtype=dtype)
+        order = np.argsort(codes, kind='mergesort')
+        frames[i] = df.iloc[order].reset_index(drop=True)
+    return frames
@@ -0,0 +1,45 @@
+""" Run per-column work of DataFrames in thread or process pools."""
+from collections import deque
+
+# Default number of columns submitted to an executor at a time
+max_pending = 16
+
+
+def map_columns(func, df, executor=None, max_pending=max_pending):
+    """Apply a function to each column of a DataFrame.
+
+    Parameters
+    ----------
+    func : callable
+        Function of a pandas.Series. It must be picklable (defined at the
+        module level) for a process pool
+
+    df : pandas.DataFrame
+        DataFrame of your data
+
+    executor : concurrent.futures.Executor, default None
+        If given, the columns are processed by the executor, e.g.
+        ThreadPoolExecutor or ProcessPoolExecutor. If None, the columns are
+        processed one by one
+
+    max_pending : int, default 16
+        Maximum number of columns submitted to the executor and not yet
+        collected, which bounds the memory of the copies sent to processes
+
+    Returns
+    -------
+    results : list
+        Results of func in the order of the columns
+    """
+    if executor is None:
+        return [func(df.iloc[:, i]) for i in range(df.shape[1])]
+
+    results = []
+    pending = deque()
+    for i in range(df.shape[1]):
+        if len(pending) >= max_pending:
+            results.append(pending.popleft().result())
+        pending.append(executor.submit(func, df.iloc[:, i]))
+    while pending:
+        results.append(pending.popleft().result())
+    return results
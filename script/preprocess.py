@@ -1,14 +1,20 @@
 """ Functions for preprocessing data."""
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import seaborn as sns
+from functools import partial
 from itertools import combinations
-from scipy.spatial.distance import cdist
+from script.fingerprint import cached, column_hashes
+from script.instrument import instrument
+from script.parallel import map_columns
+from script.sketch import approx_nunique, group_estimates
+# matplotlib, seaborn and scipy are imported by the functions which need
+# them, so that importing this module stays cheap for the other functions
+
 # Extract the numeric data in the fields of imported
 numerics = ['int16', 'int32', 'int64', 'float16', 'float32', 'float64']
 
 
+@instrument
 def pair_dist(df1, df2, dict1, dict2):
     """Determine Euclidean distances between the values of selected
     features in DataFrames
@@ -37,6 +43,7 @@ def pair_dist(df1, df2, dict1, dict2):
         DataFrame having columns from the key of dict2, index from
         the key of dict1
     """
+    from scipy.spatial.distance import cdist
     key1, val1 = list(dict1.items())[0]
     key2, val2 = list(dict2.items())[0]
     assert len(val1) == len(val2)
@@ -71,7 +78,8 @@ def sets_grps(list1, list2):
 
 
 def grp_ts_scatter(df, time, feature, grp, col_wrap=4,
-                   markersize=1.5, display_nan=False):
+                   markersize=1.5, display_nan=False, max_points=None,
+                   method='lttb', fname=None):
     """Time-series (date) scatter plots for a feature with respect to groups
 
     Parameters
@@ -96,31 +104,205 @@ def grp_ts_scatter(df, time, feature, grp, col_wrap=4,
 
     display_nan: bool, default False
         If True, plot the missing values at zeroes in red
+
+    max_points: int, default None
+        If given, the series of each group is downsampled to about
+        max_points points, plus up to max_points missing values, before
+        plotting, see downsample_grps
+
+    method: str, default 'lttb'
+        Downsampling method, either 'lttb' or 'minmax'
+
+    fname: str, default None
+        If given, save the figure to fname instead of showing it
     """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     sns.set(style="darkgrid")
 
     # explicitly define the xlim, ylim
     ylim = (df[feature].min(), df[feature].max() )
     xlim = (df[time].min(), df[time].max())
-    if display_nan:
-        df_copy = nan_zeroes(df, feature)
-        g = sns.FacetGrid(df_copy, col=grp, col_wrap=col_wrap,
-                          xlim=xlim, ylim=ylim)
+    if max_points is not None:
+        plot_df = downsample_grps(df, time, feature, grp, max_points, method)
     else:
-        g = sns.FacetGrid(df, col=grp, col_wrap=col_wrap,
-                          xlim=xlim, ylim=ylim)
+        plot_df = df
+    g = sns.FacetGrid(plot_df, col=grp, col_wrap=col_wrap,
+                      xlim=xlim, ylim=ylim)
 
-    g.map(plt.plot_date, time, feature, color="steelblue",
-          markersize=markersize)
+    g.map(plt.plot, time, feature, linestyle='', marker='o',
+          color="steelblue", markersize=markersize)
     if display_nan:
-        g = g.map(plt.plot_date, time, "nan_" + feature,
+        g = g.map(_plot_nan, time, feature,
                   color="red", markersize=markersize)
 
     g.set_xticklabels(rotation='vertical')
-    plt.show()
+    _show(fname)
+
+
+def _plot_nan(x, y, **kwargs):
+    """Plot the missing values of y at zeroes, used by FacetGrid.map"""
+    import matplotlib.pyplot as plt
+    mask = y.isnull().values
+    plt.plot(x[mask], np.zeros(mask.sum()), linestyle='', marker='o',
+             **kwargs)
+
+
+def _as_float(values):
+    """Convert datetime-like or numeric values to a float array"""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype('datetime64[ns]').astype(np.int64)
+    return values.astype(float)
+
+
+def lttb(x, y, n_out):
+    """Select the points retained by Largest-Triangle-Three-Buckets
+    downsampling.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        Sorted x values without NaN
+
+    y : numpy.ndarray
+        y values without NaN
+
+    n_out : int
+        Number of points to retain, at least 3 (the first and the last
+        points, and one per bucket)
+
+    Returns
+    -------
+    idx : numpy.ndarray
+        Positions of the retained points
+    """
+    n = len(x)
+    n_out = max(n_out, 3)
+    if n_out >= n:
+        return np.arange(n)
+    x = x - x[0]
+    # n_out - 2 buckets between the first and the last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    idx = np.empty(n_out, dtype=int)
+    idx[0] = 0
+    idx[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < n_out - 1:
+            next_lo, next_hi = edges[i + 1], edges[i + 2]
+        else:
+            next_lo, next_hi = n - 1, n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        # twice the triangle areas formed with the previous selected point
+        # and the average of the next bucket
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) -
+                      (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def minmax(x, y, n_out):
+    """Select the minimum and maximum points of equal-width x buckets.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        x values without NaN
+
+    y : numpy.ndarray
+        y values without NaN
+
+    n_out : int
+        Number of points to retain, two per bucket
+
+    Returns
+    -------
+    idx : numpy.ndarray
+        Sorted positions of the retained points
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    buckets = _buckets(x, max(n_out // 2, 1))
+    order = np.lexsort((y, buckets))
+    sorted_buckets = buckets[order]
+    change = sorted_buckets[1:] != sorted_buckets[:-1]
+    first = np.r_[True, change]
+    last = np.r_[change, True]
+    return np.unique(np.r_[order[first], order[last]])
+
+
+def _buckets(x, num):
+    """Assign x values to num equal-width buckets"""
+    span = x.max() - x.min()
+    if span == 0:
+        return np.zeros(len(x), dtype=int)
+    buckets = ((x - x.min()) / span * num).astype(int)
+    return np.minimum(buckets, num - 1)
+
+
+def downsample_grps(df, time, feature, grp, max_points=1000, method='lttb'):
+    """Downsample the time-series of a feature within each group.
+
+    Missing values of the feature are retained as one row per bucket of
+    the time axis so that they can still be displayed.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        DataFrame of your data
+
+    time: str
+        Name that labels the time-series (datetime-like object)
+
+    feature: str
+        Feature name that we downsample
+
+    grp: str
+        Column name that we separate the data with reference to
+
+    max_points: int, default 1000
+        Number of non-missing points retained for each group, at least 3
+        with 'lttb'. Up to max_points rows of missing values are retained
+        in addition, so a group returns up to about 2 * max_points rows.
 
+    method: str, default 'lttb'
+        'lttb' for Largest-Triangle-Three-Buckets, 'minmax' for the minimum
+        and maximum values of each bucket
 
-def grp_hist(df, feature, grp, col_wrap=4, bins=50):
+    Returns
+    -------
+    df_sampled : pandas.DataFrame
+        Data with the columns time, feature and grp of the retained rows
+    """
+    assert method in ('lttb', 'minmax'), "method is not 'lttb' or 'minmax'"
+    sample = lttb if method == 'lttb' else minmax
+    x_all = _as_float(df[time].values)
+    y_all = df[feature].values.astype(float)
+    missing_all = np.isnan(y_all)
+
+    retained = []
+    for pos in df.groupby(grp, sort=False).indices.values():
+        pos = pos[np.argsort(x_all[pos], kind='mergesort')]
+        missing = missing_all[pos]
+        valid = pos[~missing]
+        retained.append(valid[sample(x_all[valid], y_all[valid],
+                                     max_points)])
+        if missing.any():
+            nan_pos = pos[missing]
+            _, first = np.unique(_buckets(x_all[nan_pos], max_points),
+                                 return_index=True)
+            retained.append(nan_pos[first])
+    if not retained:
+        return df[[time, feature, grp]].iloc[:0]
+    return df[[time, feature, grp]].iloc[np.concatenate(retained)]
+
+
+def grp_hist(df, feature, grp, col_wrap=4, bins=50, fname=None):
     """Histograms illustrate the data distribution of a feature with respect
        to groups
 
@@ -140,11 +322,26 @@ def grp_hist(df, feature, grp, col_wrap=4, bins=50):
 
     bins: int
         Number of bins for histogram plot
+
+    fname: str, default None
+        If given, save the figure to fname instead of showing it
     """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     sns.set(style="darkgrid")
     g = sns.FacetGrid(df, col=grp, col_wrap=col_wrap)
     g.map(plt.hist, feature, color="steelblue", bins=bins)
-    plt.show()
+    _show(fname)
+
+
+def _show(fname=None):
+    """Show the current figure, or save it to fname and close it"""
+    import matplotlib.pyplot as plt
+    if fname is None:
+        plt.show()
+    else:
+        plt.savefig(fname)
+        plt.close('all')
 
 
 def nan_zeroes(df, feature):
@@ -175,6 +372,7 @@ def nan_zeroes(df, feature):
     return df_copy
 
 
+@instrument
 def outliers(df, col_names, low=0.05, high=0.95, outlier_as_nan=True):
     """Set ether outliers or non-outliers to be NaN
 
@@ -215,7 +413,9 @@ def outliers(df, col_names, low=0.05, high=0.95, outlier_as_nan=True):
     return df_copy
 
 
-def summary(df, quantile=None, outlier_as_nan=True, filter_outlier=False):
+@instrument
+def summary(df, quantile=None, outlier_as_nan=True, filter_outlier=False,
+            fname=None, executor=None):
     """Provide the summary of your text and numeric data.
 
     Calling this function provides the summary of text data using
@@ -237,13 +437,20 @@ def summary(df, quantile=None, outlier_as_nan=True, filter_outlier=False):
 
     filter_outlier: boolean, default True
         If True, histogram plot by filtering outliers
+
+    fname: str, default None
+        If given, save the histogram plots to fname instead of showing them
+
+    executor: concurrent.futures.Executor, default None
+        If given, the text columns are described by the thread or process
+        pool, see script.parallel.map_columns
     """
     print("-"*80)
     print("*"*20 + "    Begin of the summary of text data   " + "*"*20)
     print("-"*80)
     text_df = df.select_dtypes(exclude=numerics)
-    for x in text_df.columns:
-        print(text_df[x].describe())
+    for description in map_columns(_describe, text_df, executor):
+        print(description)
         print("\n")
 
     print("-"*80)
@@ -263,7 +470,7 @@ def summary(df, quantile=None, outlier_as_nan=True, filter_outlier=False):
     num_fig_y = int(num_df.shape[1]/4) + 1
     num_df.hist(color='k', alpha=0.5, bins=50, figsize=(10, num_fig_y*2.5),
             layout=(num_fig_y, 4))
-    plt.show()
+    _show(fname)
 
 
 def one2one(df):
@@ -294,29 +501,40 @@ def one2one(df):
     return relation
 
 
-def warn_missing(df, fname=None):
+def warn_missing(df, fname=None, executor=None):
     """Check the  missing value or NaN (Not a Number) record in data.
 
     Inform the user if any missing values or NaN found in the data.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        DataFrame of your data
+
+    fname : str, default None
+        Name of the data shown in the messages
+
+    executor : concurrent.futures.Executor, default None
+        If given, the columns are processed by the thread or process pool,
+        see script.parallel.map_columns
     """
     warn = 0
     total_counts = df.shape[0]
-    for x in df.columns:
-        y = df[x]
-        nan = y.index[y.isnull()]
-
-        if nan.shape[0] != 0:
+    counts = map_columns(_count_null, df, executor)
+    for x, count in zip(df.columns, counts):
+        if count != 0:
             warn = 1
-            percentage = nan.shape[0]/total_counts*100
+            percentage = count/total_counts*100
             print("Warning: Column {0} has ({1:.1f}%) {2:d}".format(
-                x, percentage, nan.shape[0]),
+                x, percentage, count),
                 "missing values in {0}!".format(fname))
 
     if (warn == 0):
         print("No missing values in the columns of %s!\n" % fname)
 
 
-def numeric(df, clean=True):
+@instrument
+def numeric(df, clean=True, executor=None):
     """Convert the features with partial numeric records to numeric type.
 
     Parameters
@@ -325,6 +543,10 @@ def numeric(df, clean=True):
         If True, cleaning all row entries where NaN found.
         If False, no cleaning of row entries with NaN found.
 
+    executor : concurrent.futures.Executor, default None
+        If given, the columns are processed by the thread or process pool,
+        see script.parallel.map_columns
+
     Returns
     -------
     df_copy : pandas.DataFrame
@@ -332,7 +554,10 @@ def numeric(df, clean=True):
     """
     df_copy = df.copy()
     colnames = df_copy.columns
-    temp = df_copy.apply(pd.to_numeric, args=('coerce',))
+    columns = map_columns(_to_numeric, df_copy, executor)
+    # pd.concat needs at least one column
+    temp = (pd.concat(columns, axis=1) if columns
+            else pd.DataFrame(index=df_copy.index))
     removed = []
     for x in colnames:
         # Check columns which have all values as NaN
@@ -349,7 +574,8 @@ def numeric(df, clean=True):
     return df_copy
 
 
-def unique_sets(df):
+@instrument
+def unique_sets(df, cache=None, approx=False, error=0.01, executor=None):
     """Check the columns that share the same total number of unique values.
 
     Calling this function prints out the total number of unique values
@@ -360,34 +586,98 @@ def unique_sets(df):
     df : pandas.DataFrame
          Dataframe of our data
 
+    cache : dict, default None
+        If given, the estimates of approx are stored in and reused from
+        cache for the columns whose values have not changed, see
+        script.fingerprint. Exact counts are cheaper than the fingerprints
+        and are not cached.
+
+    approx : boolean, default False
+        If True, estimate the number of unique values with HyperLogLog
+        sketches, and group the features whose estimates are within the
+        error bound, see script.sketch
+
+    error : float, default 0.01
+        Relative standard error of the estimates if approx is True
+
+    executor : concurrent.futures.Executor, default None
+        If given, the columns are processed by the thread or process pool,
+        see script.parallel.map_columns
+
     Returns
     -------
     uniq : dict
         Dictionary with the total number of unique values as keys,
         features sharing the same set of number as values.
     """
+    hashes = column_hashes(df) if cache is not None and approx else None
+    return _unique_sets(df, cache, hashes, approx, error, executor)
+
+
+def _unique_sets(df, cache, hashes, approx, error, executor):
+    """unique_sets with the column hashes computed by the caller"""
     colnames = df.columns
     uniq = {}
-    for x in colnames:
-        total = df[x].nunique()
-        # Create a list to record the columns sharing the same number
-        # of unique values
-        if total not in uniq.keys():
-            uniq[total] = []
-            uniq[total].append(x)
-        else:
-            uniq[total].append(x)
+    if approx:
+        estimates = _count_columns(partial(approx_nunique, error=error), df,
+                                   ('approx', error), cache, executor,
+                                   hashes)
+        uniq = group_estimates(dict(zip(colnames, estimates)), error)
+    else:
+        totals = map_columns(_nunique, df, executor)
+        for x, total in zip(colnames, totals):
+            # Create a list to record the columns sharing the same number
+            # of unique values
+            if total not in uniq.keys():
+                uniq[total] = []
+                uniq[total].append(x)
+            else:
+                uniq[total].append(x)
 
     print("-" * 80)
     print("Number of unique values and their corresponding features")
     print("-" * 80)
     for k in uniq.keys():
-        print("Number of unique values: {}, Features: {}".format(
-            k, uniq[k]))
+        print("Number of unique values: {}{}, Features: {}".format(
+            "~" if approx else "", k, uniq[k]))
     return uniq
 
 
-def one2one_sets(df):
+def _count_columns(count, df, tag, cache=None, executor=None, hashes=None):
+    """Evaluate count on each column of df, reusing the results in cache
+    of the columns whose values have not changed"""
+    if cache is None:
+        return map_columns(count, df, executor)
+    if hashes is None:
+        hashes = column_hashes(df)
+    keys = [tag + (hashes[x],) for x in df.columns]
+    todo = [i for i, key in enumerate(keys) if key not in cache]
+    for i, total in zip(todo, map_columns(count, df.iloc[:, todo],
+                                          executor)):
+        cache[keys[i]] = total
+    return [cache[key] for key in keys]
+
+
+# Per-column functions used by map_columns, defined at the module level
+# so that they can be sent to process pools
+def _count_null(y):
+    return int(y.isnull().sum())
+
+
+def _describe(y):
+    return y.describe()
+
+
+def _nunique(y):
+    return y.nunique()
+
+
+def _to_numeric(y):
+    return pd.to_numeric(y, errors='coerce')
+
+
+@instrument
+def one2one_sets(df, cache=None, approx=False, error=0.01, executor=None):
     """Identify one to one correspondence relationship.
 
     Parameters
@@ -395,6 +685,23 @@ def one2one_sets(df):
     df : pandas.DataFrame
          Dataframe of our data
 
+    cache : dict, default None
+        If given, the one to one checks of pairs of features, and the
+        estimates of approx, are stored in and reused from cache for the
+        columns whose values have not changed, see script.fingerprint
+
+    approx : boolean, default False
+        If True, the candidate features are grouped by their approximate
+        numbers of unique values, which are only counted exactly for the
+        groups having more than one feature
+
+    error : float, default 0.01
+        Relative standard error of the estimates if approx is True
+
+    executor : concurrent.futures.Executor, default None
+        If given, the columns are processed by the thread or process pool,
+        see script.parallel.map_columns
+
     Returns
     -------
     dict_one2one : dict
@@ -402,7 +709,23 @@ def one2one_sets(df):
         correspondence, if available.
         Each set is grouped by the key of dictionary.
     """
-    uniq = unique_sets(df)
+    # each column is fingerprinted at most once per call
+    hashes = column_hashes(df) if cache is not None and approx else None
+    uniq = _unique_sets(df, cache, hashes, approx, error, executor)
+    if approx:
+        # Confirm the candidates sharing similar estimates by exact counts,
+        # in the order of the columns as in the exact mode
+        grouped = {x for v in uniq.values() if len(v) > 1 for x in v}
+        candidates = [x for x in df.columns if x in grouped]
+        totals = map_columns(_nunique, df[candidates], executor)
+        uniq = {}
+        for x, total in zip(candidates, totals):
+            uniq.setdefault(total, []).append(x)
+    if cache is not None and hashes is None:
+        # only the pairwise checks, which cost more than the fingerprints,
+        # are cached
+        hashes = column_hashes(
+            df[[x for v in uniq.values() if len(v) > 1 for x in v]])
 
     print('*' * 10 + ' ' * 10 + "Conclusion for one to one correspondence" +
           " " * 10 + "*" * 10)
@@ -411,7 +734,9 @@ def one2one_sets(df):
         if len(v) > 1:
             pairs = []
             for x in combinations(v, 2):
-                if one2one(df[[x[0], x[1]]]):
+                key = (('one2one', hashes[x[0]], hashes[x[1]])
+                       if hashes is not None else None)
+                if cached(cache, key, lambda: one2one(df[[x[0], x[1]]])):
                     pairs.append(x)
 
             # If no pair of features which are one to one correspondent
@@ -0,0 +1,142 @@
+""" Render the plots of preprocess to files for batch reports."""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# Plotting functions of script.preprocess which accept the fname argument
+plots = ['summary', 'grp_hist', 'grp_ts_scatter']
+manifest_name = 'report.json'
+
+
+def data_hash(data, plot, kwargs, read_kwargs=None):
+    """Hash the input data and the plotting arguments of a figure.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame, or str
+        DataFrame of your data, or the file name of a .csv file
+
+    plot : str
+        Name of the plotting function
+
+    kwargs : dict
+        Keyword arguments passed to the plotting function
+
+    read_kwargs : dict, default None
+        Keyword arguments passed to pandas.read_csv
+
+    Returns
+    -------
+    digest : str
+        Hexadecimal SHA-1 digest
+    """
+    sha = hashlib.sha1()
+    sha.update(plot.encode())
+    sha.update(repr(sorted(kwargs.items())).encode())
+    sha.update(repr(sorted((read_kwargs or {}).items())).encode())
+    if isinstance(data, str):
+        with open(data, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+    else:
+        sha.update(repr(list(data.columns)).encode())
+        sha.update(repr(list(data.dtypes.astype(str))).encode())
+        sha.update(pd.util.hash_pandas_object(data, index=True).values)
+    return sha.hexdigest()
+
+
+def _init_worker():
+    """Select the non-interactive backend of matplotlib"""
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+
+def _render(plot, data, fname, kwargs, read_kwargs):
+    """Render a figure of script.preprocess to fname"""
+    from script import preprocess
+    if isinstance(data, str):
+        data = pd.read_csv(data, **read_kwargs)
+    getattr(preprocess, plot)(data, fname=fname, **kwargs)
+    return fname
+
+
+def generate_report(jobs, outdir, processes=None, ext='png'):
+    """Render the figures of a report to files with a pool of processes.
+
+    Figures whose input data and arguments have not changed since the last
+    run, as recorded in outdir/report.json, are not rendered again. If a
+    figure fails, the manifest still records the others before the first
+    error is raised.
+
+    Parameters
+    ----------
+    jobs : list
+        A list of dictionaries describing the figures, with keys
+        name: str, unique name of the figure used as the file name
+        plot: str, one of 'summary', 'grp_hist' and 'grp_ts_scatter'
+        data: pandas.DataFrame, or str of the .csv file name
+        kwargs: dict, optional arguments of the plotting function
+        read_kwargs: dict, optional arguments of pandas.read_csv
+
+    outdir : str
+        Directory where the figures are saved
+
+    processes : int, default None
+        Number of worker processes, default to the number of CPUs
+
+    ext : str, default 'png'
+        File extension which determines the figure format
+
+    Returns
+    -------
+    rendered : dict
+        Dictionary with the names of figures as keys, and the tuples of
+        (file name, True if the figure was rendered in this run) as values
+    """
+    os.makedirs(outdir, exist_ok=True)
+    manifest_fname = os.path.join(outdir, manifest_name)
+    manifest = {}
+    if os.path.exists(manifest_fname):
+        with open(manifest_fname) as f:
+            manifest = json.load(f)
+
+    # validate the jobs and hash their data before submitting any of them
+    rendered = {}
+    todo = []
+    for job in jobs:
+        name, plot, data = job['name'], job['plot'], job['data']
+        assert plot in plots, "plot must be one of {}".format(plots)
+        kwargs = job.get('kwargs', {})
+        read_kwargs = job.get('read_kwargs', {})
+        fname = os.path.join(outdir, "{}.{}".format(name, ext))
+        digest = data_hash(data, plot, kwargs, read_kwargs)
+        if (manifest.get(name) == digest) and os.path.exists(fname):
+            rendered[name] = (fname, False)
+            continue
+        todo.append((name, digest, (plot, data, fname, kwargs, read_kwargs)))
+
+    failed = None
+    try:
+        with ProcessPoolExecutor(max_workers=processes,
+                                 initializer=_init_worker) as executor:
+            futures = [(name, digest, executor.submit(_render, *args))
+                       for name, digest, args in todo]
+
+            # record the figures rendered even if others fail
+            for name, digest, future in futures:
+                try:
+                    rendered[name] = (future.result(), True)
+                except Exception as error:
+                    manifest.pop(name, None)
+                    failed = failed or error
+                    continue
+                manifest[name] = digest
+    finally:
+        with open(manifest_fname, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+    if failed is not None:
+        raise failed
+    return rendered
@@ -0,0 +1,154 @@
+""" HyperLogLog sketches for approximate numbers of unique values."""
+import math
+
+import numpy as np
+import pandas as pd
+
+# Maximum number of bits indexing the registers, i.e. 256 KB of registers
+max_p = 18
+# Smallest relative standard error of a sketch with 2**max_p registers
+min_error = 1.04 / math.sqrt(1 << max_p)
+# Bit lengths are found by searching the powers of two
+_powers = np.left_shift(np.uint64(1), np.arange(64, dtype=np.uint64))
+
+
+class HyperLogLog(object):
+    """A HyperLogLog sketch estimating the number of unique values.
+
+    Sketches built with the same error can be merged, e.g. the sketches of
+    different chunks of a column, or those returned by worker processes.
+
+    Parameters
+    ----------
+    error : float, default 0.01
+        Relative standard error of the estimates, which determines the
+        number of registers. It must be at least min_error (about 0.002).
+
+    Attributes
+    ----------
+    p : int
+        Number of bits of the hashes indexing the registers
+
+    registers : numpy.ndarray
+        uint8 array of 2**p registers
+    """
+    def __init__(self, error=0.01):
+        assert min_error <= error < 1, \
+            "error must be between {:.5f} and 1".format(min_error)
+        self.error = error
+        self.p = min(max(int(math.ceil(math.log2((1.04 / error)**2))), 4),
+                     max_p)
+        self.registers = np.zeros(1 << self.p, dtype=np.uint8)
+
+    def update(self, values):
+        """Add values to the sketch, missing values are ignored.
+
+        Parameters
+        ----------
+        values : pandas.Series, or array-like
+
+        Returns
+        -------
+        self : HyperLogLog
+        """
+        values = pd.Series(values).dropna()
+        if values.empty:
+            return self
+        hashes = pd.util.hash_pandas_object(values, index=False).values
+        bits = 64 - self.p
+        idx = (hashes >> np.uint64(bits)).astype(np.intp)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # position of the leftmost 1-bit of rest, within the lower bits
+        rank = bits + 1 - np.searchsorted(_powers, rest, side='right')
+        np.maximum.at(self.registers, idx, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other):
+        """Merge another sketch built with the same error into this sketch.
+
+        Parameters
+        ----------
+        other : HyperLogLog
+
+        Returns
+        -------
+        self : HyperLogLog
+        """
+        assert self.p == other.p, "Sketches have different number of registers"
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        """Estimate the number of unique values.
+
+        Returns
+        -------
+        estimate : int
+        """
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(
+            np.ldexp(1.0, -self.registers.astype(int)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros > 0:
+            # linear counting for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+def approx_nunique(values, error=0.01, chunksize=1000000):
+    """Approximate number of unique values, hashing values by chunks.
+
+    Parameters
+    ----------
+    values : pandas.Series
+
+    error : float, default 0.01
+        Relative standard error of the estimate
+
+    chunksize : int, default 1000000
+        Number of values hashed at a time
+
+    Returns
+    -------
+    estimate : int
+    """
+    sketch = HyperLogLog(error)
+    for start in range(0, len(values), chunksize):
+        sketch.update(values.iloc[start:start + chunksize])
+    return sketch.count()
+
+
+def group_estimates(estimates, error=0.01):
+    """Group the features by their approximate numbers of unique values.
+
+    Features are sorted by their estimates, and a new group starts where
+    two consecutive estimates differ by more than the error bound. Features
+    which may have the same exact number are thus in the same group, while
+    a group may chain features of different numbers.
+
+    Parameters
+    ----------
+    estimates : dict
+        Dictionary with features as keys, estimates as values
+
+    error : float, default 0.01
+        Relative standard error of the estimates
+
+    Returns
+    -------
+    uniq : dict
+        Dictionary with the smallest estimate of each group as keys,
+        features of the group as values
+    """
+    # about four standard errors of the difference between two estimates
+    tolerance = 6 * error
+    uniq = {}
+    first = previous = None
+    for x, total in sorted(estimates.items(), key=lambda item: item[1]):
+        if previous is None or total > previous * (1 + tolerance):
+            first = total
+            uniq[first] = []
+        uniq[first].append(x)
+        previous = total
+    return uniq